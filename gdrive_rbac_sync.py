@@ -14,7 +14,11 @@ Two modes:
 import os
 import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import httplib2
+import google_auth_httplib2
 from googleapiclient.discovery import build
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -29,6 +33,14 @@ SHARED_DRIVE_ID = "<YOUR_SHARED_DRIVE_ID>"
 
 SCOPES = ["https://www.googleapis.com/auth/drive"]
 
+# Drive accepts at most 100 calls per batch request
+BATCH_SIZE = 100
+
+# Direct user mode: send grants through the batch endpoint. Set to False to
+# issue one call per grant (clearer per-call errors), run in parallel threads.
+USE_BATCH = True
+MAX_WORKERS = 16
+
 # Map OCM role -> Google Drive role
 OCM_ROLE_TO_GDRIVE_ROLE = {
     "manager": "organizer",
@@ -55,7 +67,7 @@ logging.basicConfig(
 # ---------------------------------- #
 
 
-def get_drive_service():
+def get_credentials():
     creds = None
     if os.path.exists("token.json"):
         creds = Credentials.from_authorized_user_file("token.json", SCOPES)
@@ -69,11 +81,28 @@ def get_drive_service():
             creds = flow.run_local_server(port=0)
         with open("token.json", "w") as token:
             token.write(creds.to_json())
+    return creds
+
 
+def get_drive_service(creds):
     service = build("drive", "v3", credentials=creds)
     return service
 
 
+_thread_local = threading.local()
+
+
+def thread_http(creds):
+    """
+    httplib2.Http is not thread-safe: give each worker thread its own.
+    """
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+        _thread_local.http = http
+    return http
+
+
 def load_rbac():
     if not os.path.exists(RBAC_JSON):
         logging.error("rbac.json not found at %s", RBAC_JSON)
@@ -84,16 +113,21 @@ def load_rbac():
     return data
 
 
-def add_permission(drive, email, role, type_="user"):
-    """
-    Adds permission on the Shared Drive.
-    For Shared Drives, we use 'drive' permission.
-    """
-    body = {
+def permission_body(email, role, type_="user"):
+    return {
         "role": role,
         "type": type_,
         "emailAddress": email,
     }
+
+
+def add_permission(drive, email, role, type_="user", http=None):
+    """
+    Adds permission on the Shared Drive.
+    For Shared Drives, we use 'drive' permission.
+    Pass http to execute on a connection other than the service's own.
+    """
+    body = permission_body(email, role, type_)
     logging.info("Adding %s permission for %s on shared drive %s", role, email, SHARED_DRIVE_ID)
     try:
         drive.permissions().create(
@@ -101,15 +135,79 @@ def add_permission(drive, email, role, type_="user"):
             body=body,
             supportsAllDrives=True,
             sendNotificationEmail=False,
-        ).execute()
+        ).execute(http=http)
+        return True
     except Exception as e:
         logging.error("Failed to add permission for %s: %s", email, e)
+        return False
+
+
+def add_permissions_batch(drive, grants):
+    """
+    Adds permissions on the Shared Drive using Drive's batch endpoint.
+
+    grants: list of (email, role, type_) tuples. Requests are sent in
+    chunks of BATCH_SIZE, one HTTP round-trip per chunk.
+    Returns the number of failed grants.
+    """
+    failures = []
+
+    def callback(request_id, response, exception):
+        if exception is not None:
+            email = grants[int(request_id)][0]
+            logging.error("Failed to add permission for %s: %s", email, exception)
+            failures.append(email)
+
+    for start in range(0, len(grants), BATCH_SIZE):
+        chunk = grants[start:start + BATCH_SIZE]
+        batch = drive.new_batch_http_request(callback=callback)
+        for i, (email, role, type_) in enumerate(chunk, start):
+            logging.info("Adding %s permission for %s on shared drive %s", role, email, SHARED_DRIVE_ID)
+            batch.add(
+                drive.permissions().create(
+                    fileId=SHARED_DRIVE_ID,
+                    body=permission_body(email, role, type_),
+                    supportsAllDrives=True,
+                    sendNotificationEmail=False,
+                ),
+                request_id=str(i),
+            )
+        try:
+            batch.execute()
+        except Exception as e:
+            # The whole batch request failed (auth, network, ...)
+            logging.error("Batch request for grants %d-%d failed: %s",
+                          start, start + len(chunk) - 1, e)
+            failures.extend(email for email, _, _ in chunk)
+
+    return len(failures)
 
 
-def sync_rbac_direct_users(drive, members):
+def add_permissions_parallel(drive, creds, grants):
+    """
+    Adds permissions one call per grant, spread over MAX_WORKERS threads.
+    Returns the number of failed grants.
+    """
+    def worker(email, role, type_):
+        return add_permission(drive, email, role, type_, http=thread_http(creds))
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [executor.submit(worker, *g) for g in grants]
+        for f in as_completed(futures):
+            if not f.result():
+                failed += 1
+    return failed
+
+
+def sync_rbac_direct_users(drive, members, creds=None):
     """
     Assign permissions directly to each user.
+
+    Uses the batch endpoint when USE_BATCH is set (or no creds are given),
+    else parallel per-grant calls.
     """
+    grants = []
     for m in members:
         # You may need to adapt keys based on actual OCM RBAC schema
         role = (m.get("role") or "").lower()
@@ -124,7 +222,14 @@ def sync_rbac_direct_users(drive, members):
             logging.warning("Unknown OCM role '%s' for %s", role, email)
             continue
 
-        add_permission(drive, email, gdrive_role, type_="user")
+        grants.append((email, gdrive_role, "user"))
+
+    if USE_BATCH or creds is None:
+        failed = add_permissions_batch(drive, grants)
+    else:
+        failed = add_permissions_parallel(drive, creds, grants)
+    if failed:
+        logging.error("%d of %d permission grants failed", failed, len(grants))
 
 
 def sync_rbac_groups(drive, members):
@@ -151,7 +256,8 @@ def sync_rbac_groups(drive, members):
 
 
 def main():
-    drive = get_drive_service()
+    creds = get_credentials()
+    drive = get_drive_service(creds)
     members = load_rbac()
     if not members:
         logging.error("No RBAC data to sync.")
@@ -162,7 +268,7 @@ def main():
         sync_rbac_groups(drive, members)
     else:
         logging.info("Syncing RBAC in DIRECT USER mode...")
-        sync_rbac_direct_users(drive, members)
+        sync_rbac_direct_users(drive, members, creds)
 
     logging.info("RBAC sync complete.")
 
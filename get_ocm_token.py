@@ -1,9 +1,15 @@
 import requests
 import yaml
 import sys
+import time
+import json
 import base64
 from pathlib import Path
 
+TOKEN_CACHE = Path("ocm_token.json")
+# Refresh this many seconds before the token actually expires
+EXPIRY_LEEWAY = 10
+
 
 def load_config():
     """Load configuration from config.yaml"""
@@ -17,8 +23,28 @@ def load_config():
         return yaml.safe_load(f)
 
 
+def load_cached_token():
+    """Return the cached token if it is still valid, else None"""
+    if not TOKEN_CACHE.exists():
+        return None
+
+    try:
+        with open(TOKEN_CACHE, "r") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if cached.get("access_token") and cached.get("expires_at", 0) > time.time():
+        print("♻️  Reusing cached OCM API token.")
+        return cached["access_token"]
+    return None
+
+
 def get_ocm_token(client_id, client_secret, token_url, scope):
-    """Fetch OAuth2 Client Credentials token from IDCS"""
+    """Fetch OAuth2 Client Credentials token from IDCS.
+
+    Returns (access_token, expires_in).
+    """
     print("🔐 Requesting OCM API token...")
 
     try:
@@ -46,18 +72,24 @@ def get_ocm_token(client_id, client_secret, token_url, scope):
             sys.exit(1)
 
         print("✅ Token successfully retrieved.")
-        return access_token
+        return access_token, token_json.get("expires_in", 0)
 
     except Exception as e:
         print("❌ Exception while getting token:", str(e))
         sys.exit(1)
 
 
-def save_token(token):
-    """Save token to local file for re-use"""
+def save_token(token, expires_in):
+    """Save token to local files for re-use"""
     with open("ocm_token.txt", "w") as f:
         f.write(token)
-    print("💾 Token saved to ocm_token.txt")
+
+    with open(TOKEN_CACHE, "w") as f:
+        json.dump({
+            "access_token": token,
+            "expires_at": time.time() + int(expires_in) - EXPIRY_LEEWAY,
+        }, f)
+    print(f"💾 Token saved to ocm_token.txt and {TOKEN_CACHE}")
 
 
 if __name__ == "__main__":
@@ -68,8 +100,10 @@ if __name__ == "__main__":
     TOKEN_URL = config["ocm"]["token_url"]
     SCOPE = config["ocm"]["scope"]
 
-    token = get_ocm_token(CLIENT_ID, CLIENT_SECRET, TOKEN_URL, SCOPE)
-    save_token(token)
+    token = load_cached_token()
+    if not token:
+        token, expires_in = get_ocm_token(CLIENT_ID, CLIENT_SECRET, TOKEN_URL, SCOPE)
+        save_token(token, expires_in)
 
     print("\n🔑 Your OCM API token:")
     print(token)
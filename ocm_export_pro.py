@@ -8,7 +8,8 @@ Production-style OCM export:
 - Builds local folder tree from OCM folder metadata
 - Downloads binaries in parallel (thread pool)
 - Streams large files (1MB chunks)
-- Checkpointed via state.json and file existence
+- Checkpointed via state.json (offset of fully downloaded pages) and
+  state.db (finished assets)
 - Per-asset metadata written to assets.jsonl
 
 Output structure:
@@ -22,17 +23,28 @@ ocm_export/
     folders.json       # raw OCM folder metadata
     rbac.json          # (optional, RBAC export)
     state.json         # checkpoint
+    state.db           # sqlite index of downloaded assets
 """
 
 import os
 import json
 import time
+import random
+import shutil
+import sqlite3
+import queue
 import logging
 import threading
+from functools import lru_cache
+from collections import defaultdict, deque
 from urllib.parse import urljoin
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
 
 import yaml
 
@@ -46,6 +58,9 @@ PAGE_LIMIT = CONFIG["ocm"]["page_limit"]
 MAX_RETRIES = CONFIG["ocm"]["max_retries"]
 CHUNK_SIZE = CONFIG["ocm"]["chunk_size_mb"] * 1024 * 1024
 MAX_WORKERS = CONFIG["ocm"]["max_workers"]
+# Downloads are I/O-bound (threads sit in recv with the GIL released),
+# so they can run well above max_workers
+DOWNLOAD_WORKERS = CONFIG["ocm"].get("download_workers", MAX_WORKERS)
 
 EXPORT_ROOT = CONFIG["output"]["root_dir"]
 FILES_DIR = CONFIG["output"]["files_dir"]
@@ -53,12 +68,16 @@ META_DIR = CONFIG["output"]["meta_dir"]
 
 
 STATE_FILE = os.path.join(META_DIR, "state.json")
+STATE_DB = os.path.join(META_DIR, "state.db")
 ASSETS_JSONL = os.path.join(META_DIR, "assets.jsonl")
 FOLDERS_JSON = os.path.join(META_DIR, "folders.json")
 RBAC_JSON = os.path.join(META_DIR, "rbac.json")
 
 LOG_LEVEL = logging.INFO
 
+# Metadata files are machine-consumed: write compact JSON unless OCM_PRETTY is set
+JSON_OPTIONS = orjson.OPT_INDENT_2 if os.environ.get("OCM_PRETTY") else 0
+
 # ---------------------------------------- #
 
 logging.basicConfig(
@@ -69,11 +88,35 @@ log = logging.getLogger(__name__)
 
 session = requests.Session()
 session.headers.update({"Authorization": f"Bearer {OCM_TOKEN}"})
+# Default pool keeps only 10 connections per host; size it so every download
+# thread (plus the page prefetcher) keeps a warm TCP+TLS connection.
+# Connection errors and retryable statuses are retried by urllib3 itself, with
+# jittered exponential backoff and Retry-After honored (no thundering herd).
+retry = Retry(
+    total=MAX_RETRIES,
+    backoff_factor=1.0,
+    backoff_jitter=1.0,
+    status_forcelist=(429, 500, 502, 503, 504),
+    respect_retry_after_header=True,
+)
+adapter = HTTPAdapter(
+    pool_connections=MAX_WORKERS,
+    pool_maxsize=DOWNLOAD_WORKERS + 1,
+    max_retries=retry,
+)
+session.mount("https://", adapter)
+session.mount("http://", adapter)
 
-# thread-safe metadata append
-meta_lock = threading.Lock()
+# (asset_id, line) pairs for assets.jsonl, queued by download workers and
+# written by a single writer thread (see metadata_writer); None tells the
+# writer to stop
+meta_queue = queue.Queue()
 folder_tree_lock = threading.Lock()
 
+# sqlite index of finished downloads, shared by all download threads
+state_db = None
+state_db_lock = threading.Lock()
+
 
 def ensure_dirs():
     os.makedirs(FILES_DIR, exist_ok=True)
@@ -89,89 +132,150 @@ def load_state():
 
 def save_state(state):
     tmp = STATE_FILE + ".tmp"
-    with open(tmp, "w") as f:
-        json.dump(state, f, indent=2)
+    with open(tmp, "wb") as f:
+        f.write(orjson.dumps(state, option=JSON_OPTIONS))
     os.replace(tmp, STATE_FILE)
 
 
-def get_json(path, params=None, max_retries=MAX_RETRIES):
+def open_state_db():
+    global state_db
+    state_db = sqlite3.connect(STATE_DB, check_same_thread=False)
+    state_db.execute("PRAGMA journal_mode=WAL")
+    state_db.execute("PRAGMA synchronous=NORMAL")
+    state_db.execute(
+        "CREATE TABLE IF NOT EXISTS done ("
+        "asset_id TEXT PRIMARY KEY, path TEXT, size INTEGER, mtime REAL)"
+    )
+    state_db.commit()
+
+
+def close_state_db():
+    global state_db
+    if state_db is not None:
+        state_db.close()
+        state_db = None
+
+
+def is_asset_done(asset_id):
+    with state_db_lock:
+        row = state_db.execute(
+            "SELECT 1 FROM done WHERE asset_id = ?", (asset_id,)
+        ).fetchone()
+    return row is not None
+
+
+def mark_asset_done(asset_id, path):
+    st = os.stat(path)
+    with state_db_lock:
+        state_db.execute(
+            "INSERT OR REPLACE INTO done (asset_id, path, size, mtime) VALUES (?, ?, ?, ?)",
+            (asset_id, path, st.st_size, st.st_mtime),
+        )
+        state_db.commit()
+
+
+def get_json(path, params=None):
+    # Retries happen in the session's adapter (see `retry` above)
     url = urljoin(OCM_BASE_URL, path)
-    for attempt in range(1, max_retries + 1):
-        try:
-            resp = session.get(url, params=params, timeout=60)
-            if resp.status_code == 200:
-                return resp.json()
-            log.warning("GET %s failed (%s): %s", url, resp.status_code, resp.text)
-        except Exception as e:
-            log.warning("GET %s exception on attempt %d: %s", url, attempt, e)
-        time.sleep(2 ** attempt)
-    raise RuntimeError(f"GET {url} failed after {max_retries} attempts")
+    resp = session.get(url, params=params, timeout=60)
+    resp.raise_for_status()
+    return resp.json()
+
+
+_BAD_FILENAME_CHARS = str.maketrans({c: "_" for c in '/\\:*?"<>|'})
 
 
 def sanitize_filename(name: str) -> str:
-    bad_chars = ['/', '\\', ':', '*', '?', '"', '<', '>', '|']
-    for c in bad_chars:
-        name = name.replace(c, "_")
-    return name.strip() or "unnamed"
+    return name.translate(_BAD_FILENAME_CHARS).strip() or "unnamed"
+
+
+# crude mapping of mime subtypes whose extension differs from the subtype
+_SUBTYPE_EXT = {"jpeg": ".jpg", "pjpeg": ".jpg", "plain": ".txt"}
 
 
+@lru_cache(maxsize=256)
 def guess_ext(mime_type: str) -> str:
-    if not mime_type:
+    if not mime_type or "/" not in mime_type:
         return ""
-    if "/" in mime_type:
-        _, subtype = mime_type.split("/", 1)
-        subtype = subtype.split(";")[0]
-        # crude mapping
-        if subtype in ("jpeg", "pjpeg"):
-            return ".jpg"
-        if subtype in ("plain",):
-            return ".txt"
-        return "." + subtype
-    return ""
+    subtype = mime_type.split("/", 1)[1].split(";")[0]
+    return _SUBTYPE_EXT.get(subtype, "." + subtype)
 
 
 # ---------- Folder tree logic ---------- #
 
-def export_folders():
+def iter_folders():
     """
-    Fetch all folder assets from OCM and dump to folders.json.
+    Yield folder assets from OCM one at a time, in listing order.
+
+    Pages have no inter-page dependency, so MAX_WORKERS pages are requested
+    speculatively at a time; listing stops at the first empty page.
 
     NOTE: You may need to adjust the filter query / 'type' depending on OCM schema.
     """
-    log.info("Exporting folder metadata...")
-    all_folders = []
-    offset = 0
-    while True:
+    def fetch_page(page_offset):
         params = {
             "repositoryId": REPOSITORY_ID,
-            "offset": offset,
+            "offset": page_offset,
             "limit": PAGE_LIMIT,
             # Filter for folders, if your OCM supports it; else filter later.
             # "q": "(type:folder)"
         }
-        data = get_json("management/api/v1.1/assets", params=params)
-        items = data.get("items", [])
-        if not items:
-            break
+        return get_json("management/api/v1.1/assets", params=params)
 
-        for item in items:
-            # Heuristic: treat anything with type=="folder" as folder
-            if item.get("type") == "folder":
-                all_folders.append(item)
+    offset = 0
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        while True:
+            window = [
+                executor.submit(fetch_page, offset + i * PAGE_LIMIT)
+                for i in range(MAX_WORKERS)
+            ]
+            for fut in window:
+                items = fut.result().get("items", [])
+                if not items:
+                    # Pages after the first empty one are dropped
+                    for rest in window:
+                        rest.cancel()
+                    return
+
+                for item in items:
+                    # Heuristic: treat anything with type=="folder" as folder
+                    if item.get("type") == "folder":
+                        yield item
+
+            offset += MAX_WORKERS * PAGE_LIMIT
 
-        offset += PAGE_LIMIT
 
-    with open(FOLDERS_JSON, "w") as f:
-        json.dump(all_folders, f, indent=2)
+def export_folders():
+    """
+    Stream all folder assets from OCM into folders.json, yielding each folder.
 
-    log.info("Exported %d folders to %s", len(all_folders), FOLDERS_JSON)
-    return all_folders
+    folders.json is written incrementally and only moved into place once the
+    generator is exhausted, so a partial export is never reused.
+    """
+    log.info("Exporting folder metadata...")
+    tmp = FOLDERS_JSON + ".tmp"
+    count = 0
+    with open(tmp, "wb") as f:
+        f.write(b"[\n")
+        for folder in iter_folders():
+            if count:
+                f.write(b",\n")
+            f.write(orjson.dumps(folder, option=JSON_OPTIONS))
+            count += 1
+            yield folder
+        f.write(b"\n]\n")
+    os.replace(tmp, FOLDERS_JSON)
+
+    log.info("Exported %d folders to %s", count, FOLDERS_JSON)
 
 
 def build_folder_paths(folders):
     """
     Build a mapping from OCM folder id -> relative path like "Compliance/Subfolder".
 
+    folders may be any iterable (e.g. the export_folders() stream); it is
+    consumed once.
+
     You MUST adapt the key names below based on real OCM folder JSON:
     - folder_id_key: typically 'id'
     - parent_id_key: might be 'parentID', 'parentId', or something under 'parent'
@@ -193,27 +297,41 @@ def build_folder_paths(folders):
             return parent.get("id")
         return None
 
-    cache = {}
+    # One pass to pull out what the path build needs
+    parent_of = {fid: get_parent_id(f) for fid, f in by_id.items()}
+    name_of = {fid: sanitize_filename(f.get("name", fid)) for fid, f in by_id.items()}
 
-    def resolve_path(fid):
-        if fid in cache:
-            return cache[fid]
-        folder = by_id.get(fid)
-        if not folder:
-            return ""
-        name = sanitize_filename(folder.get("name", fid))
-        parent_id = get_parent_id(folder)
+    # Invert the tree once, then BFS down from the roots: each path is one
+    # concatenation onto its parent's path.
+    children = defaultdict(list)
+    roots = []
+    for fid, parent_id in parent_of.items():
         if parent_id and parent_id in by_id:
-            parent_path = resolve_path(parent_id)
-            path = os.path.join(parent_path, name) if parent_path else name
+            children[parent_id].append(fid)
         else:
-            path = name
-        cache[fid] = path
-        return path
+            roots.append(fid)
 
     folder_paths = {}
+
+    def bfs(start):
+        folder_paths[start] = name_of[start]
+        pending = deque([start])
+        while pending:
+            node = pending.popleft()
+            node_path = folder_paths[node]
+            for child in children[node]:
+                if child not in folder_paths:
+                    folder_paths[child] = node_path + "/" + name_of[child]
+                    pending.append(child)
+
+    for root in roots:
+        bfs(root)
+
+    # Folders in a parent cycle are unreachable from any root: start from
+    # the first one found as if it were a root
     for fid in by_id:
-        folder_paths[fid] = resolve_path(fid)
+        if fid not in folder_paths:
+            bfs(fid)
 
     log.info("Constructed folder paths for %d folders", len(folder_paths))
     return folder_paths
@@ -221,20 +339,118 @@ def build_folder_paths(folders):
 
 # ---------- Asset export & downloads ---------- #
 
+def load_written_asset_ids():
+    """
+    Collect the ids already in assets.jsonl from earlier runs.
+
+    Returns (ids, needs_newline): needs_newline is set when the file ends in
+    a partial line (e.g. the previous run was killed mid-write).
+    """
+    ids = set()
+    needs_newline = False
+    if not os.path.exists(ASSETS_JSONL):
+        return ids, needs_newline
+    with open(ASSETS_JSONL, "rb") as f:
+        for line in f:
+            needs_newline = not line.endswith(b"\n")
+            try:
+                ids.add(orjson.loads(line).get("id"))
+            except orjson.JSONDecodeError:
+                continue
+    return ids, needs_newline
+
+
+def metadata_writer():
+    """
+    Drain meta_queue into assets.jsonl through one long-lived buffered handle.
+
+    Each asset id is written at most once across all runs, so re-runs that
+    skip finished assets don't duplicate their records.
+    """
+    written, needs_newline = load_written_asset_ids()
+    with open(ASSETS_JSONL, "ab", buffering=1 << 16) as f:
+        if needs_newline:
+            f.write(b"\n")
+        while True:
+            entry = meta_queue.get()
+            if entry is None:
+                break
+            asset_id, line = entry
+            if asset_id in written:
+                continue
+            written.add(asset_id)
+            f.write(line)
+
+
+def start_metadata_writer():
+    writer = threading.Thread(target=metadata_writer, name="assets-jsonl-writer", daemon=True)
+    writer.start()
+    return writer
+
+
+def stop_metadata_writer(writer):
+    meta_queue.put(None)
+    writer.join()
+
+
 def append_asset_metadata(asset):
     """
-    Write asset JSON as a single line to assets.jsonl (thread-safe).
+    Queue asset JSON as a single line for assets.jsonl (thread-safe, lock-free).
+    Duplicates are dropped by the writer.
     """
-    with meta_lock:
-        with open(ASSETS_JSONL, "a") as f:
-            f.write(json.dumps(asset) + "\n")
+    meta_queue.put((asset.get("id"), orjson.dumps(asset) + b"\n"))
+
+
+class StreamInterrupted(Exception):
+    """A download broke off mid-body; the next attempt resumes from the .part file."""
+
+
+def parse_content_range_total(content_range):
+    """
+    Total length from a Content-Range header ("bytes 0-99/1234", "bytes */1234"),
+    or None if absent or unknown.
+    """
+    if not content_range or "/" not in content_range:
+        return None
+    total = content_range.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+
+def response_validator(r):
+    """
+    Validator usable in If-Range: a strong ETag, else Last-Modified, else None.
+    """
+    etag = r.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return r.headers.get("Last-Modified")
+
+
+def remove_if_exists(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
 
 
 def download_asset_binary(asset, folder_paths):
     """
-    Download one asset's binary with retries, streaming, and resume-by-skip.
+    Download one asset's binary with retries, streaming, and resume.
+
+    Complete files are skipped; an interrupted .part file is continued with
+    an HTTP Range request instead of being downloaded again from byte 0.
+    The .part file's validator (ETag / Last-Modified, kept in .part.etag) is
+    sent as If-Range, so a changed asset comes back whole instead of being
+    spliced onto the old bytes.
     """
     asset_id = asset.get("id")
+
+    # Already downloaded in an earlier run: one indexed lookup, no filesystem stat
+    if is_asset_done(asset_id):
+        log.debug("Skipping finished asset %s", asset_id)
+        append_asset_metadata(asset)
+        return
+
     name = asset.get("name") or asset_id
     mime_type = asset.get("mimeType")
 
@@ -258,32 +474,97 @@ def download_asset_binary(asset, folder_paths):
     filename = f"{asset_id}_{safe_name}{ext}"
     local_path = os.path.join(local_dir, filename)
 
-    # If file already exists and non-zero size, skip
+    # Finished before state.db existed (or it was lost): backfill the index
     if os.path.exists(local_path) and os.path.getsize(local_path) > 0:
         log.debug("Skipping existing file %s", local_path)
+        mark_asset_done(asset_id, local_path)
         append_asset_metadata(asset)
         return
 
     url = urljoin(OCM_BASE_URL, f"published/api/v1.1/assets/{asset_id}/native")
 
+    tmp_path = local_path + ".part"
+    validator_path = tmp_path + ".etag"
+
     for attempt in range(1, MAX_RETRIES + 1):
         try:
-            log.info("Downloading %s -> %s (attempt %d)", asset_id, local_path, attempt)
-            with session.get(url, stream=True, timeout=120) as r:
-                if r.status_code != 200:
-                    log.warning("Download %s failed (%s): %s", asset_id, r.status_code, r.text)
-                    raise RuntimeError(f"status {r.status_code}")
-                tmp_path = local_path + ".part"
-                with open(tmp_path, "wb") as f:
-                    for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
-                        if chunk:
-                            f.write(chunk)
+            # Resume a partial download (earlier run or attempt) from where it stopped
+            resume_from = os.path.getsize(tmp_path) if os.path.exists(tmp_path) else 0
+            validator = None
+            if resume_from:
+                if os.path.exists(validator_path):
+                    with open(validator_path) as f:
+                        validator = f.read().strip()
+                if not validator:
+                    # Can't prove the remote asset is unchanged: start over
+                    log.info("No validator for %s, restarting from byte 0", tmp_path)
+                    os.remove(tmp_path)
+                    resume_from = 0
+            # Media is already compressed, don't ask for gzip on top
+            headers = {"Accept-Encoding": "identity"}
+            if resume_from:
+                headers["Range"] = f"bytes={resume_from}-"
+                headers["If-Range"] = validator
+                log.info("Resuming %s -> %s at byte %d (attempt %d)",
+                         asset_id, local_path, resume_from, attempt)
+            else:
+                log.info("Downloading %s -> %s (attempt %d)", asset_id, local_path, attempt)
+
+            with session.get(url, stream=True, timeout=120, headers=headers) as r:
+                total = parse_content_range_total(r.headers.get("Content-Range"))
+                if r.status_code == 416 and resume_from and total == resume_from:
+                    # .part already holds the whole file
+                    mode = None
+                elif r.status_code == 206 and resume_from:
+                    if not r.headers.get("Content-Range", "").startswith(f"bytes {resume_from}-"):
+                        raise RuntimeError(f"unexpected Content-Range {r.headers.get('Content-Range')}")
+                    mode = "ab"
+                elif r.status_code == 200:
+                    # Full body (no partial file, asset changed since the .part
+                    # was written, or server ignored the Range)
+                    mode = "wb"
+                    new_validator = response_validator(r)
+                    if new_validator:
+                        with open(validator_path, "w") as f:
+                            f.write(new_validator)
+                    else:
+                        remove_if_exists(validator_path)
+                elif r.status_code == 416:
+                    # Stale partial file, start over on the next attempt
+                    os.remove(tmp_path)
+                    remove_if_exists(validator_path)
+                    raise StreamInterrupted(f"range not satisfiable at byte {resume_from}")
+                else:
+                    # Retryable statuses were already retried by the adapter
+                    raise RuntimeError(f"status {r.status_code}: {r.text}")
+
+                if mode:
+                    # Copy straight from the urllib3 stream in CHUNK_SIZE reads,
+                    # without a Python-level loop over iter_content
+                    r.raw.decode_content = True
+                    try:
+                        with open(tmp_path, mode) as f:
+                            shutil.copyfileobj(r.raw, f, length=CHUNK_SIZE)
+                    except (Urllib3HTTPError, ConnectionError) as e:
+                        raise StreamInterrupted(e) from e
+
+                if total is not None and os.path.getsize(tmp_path) != total:
+                    raise StreamInterrupted(
+                        f"size mismatch: got {os.path.getsize(tmp_path)} of {total} bytes"
+                    )
                 os.replace(tmp_path, local_path)
+                remove_if_exists(validator_path)
+            mark_asset_done(asset_id, local_path)
             append_asset_metadata(asset)
             return
+        except StreamInterrupted as e:
+            log.warning("Download %s interrupted: %s", asset_id, e)
+            time.sleep(random.uniform(0, 2 ** attempt))
         except Exception as e:
-            log.warning("Error downloading %s: %s", asset_id, e)
-            time.sleep(2 ** attempt)
+            # Connect errors and statuses are retried by the adapter; nothing
+            # left to gain by looping here
+            log.error("Giving up on asset %s: %s", asset_id, e)
+            return
 
     log.error("Giving up on asset %s after %d attempts", asset_id, MAX_RETRIES)
 
@@ -292,7 +573,10 @@ def export_assets(folder_paths):
     """
     Paginate through OCM assets, schedule downloads for non-folder items.
 
-    Uses state.json['last_offset'] as a checkpoint.
+    Uses state.json['last_offset'] as a checkpoint. The offset only moves past
+    a page once every download from that page has finished, so a killed run
+    re-lists any page with unfinished downloads (finished ones are skipped via
+    state.db).
     """
     state = load_state()
     offset = state.get("last_offset", 0)
@@ -302,37 +586,59 @@ def export_assets(folder_paths):
     total_assets = 0
     file_assets = 0
 
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+    def fetch_page(page_offset):
+        params = {
+            "repositoryId": REPOSITORY_ID,
+            "offset": page_offset,
+            "limit": PAGE_LIMIT,
+        }
+        return get_json("management/api/v1.1/assets", params=params)
+
+    # (end offset, download futures) per listed page, oldest first
+    pending_pages = deque()
+
+    def advance_checkpoint():
+        advanced = False
+        while pending_pages and all(f.done() for f in pending_pages[0][1]):
+            state["last_offset"] = pending_pages.popleft()[0]
+            advanced = True
+        if advanced:
+            save_state(state)
+
+    # Page listing runs on its own single worker so the next page is fetched
+    # while the current one's downloads are in flight (1-deep prefetch).
+    # It must not share the download pool: it would queue behind downloads.
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor, \
+            ThreadPoolExecutor(max_workers=1) as page_executor:
         futures = []
+        next_page = page_executor.submit(fetch_page, offset)
 
         while True:
-            params = {
-                "repositoryId": REPOSITORY_ID,
-                "offset": offset,
-                "limit": PAGE_LIMIT,
-            }
-            data = get_json("management/api/v1.1/assets", params=params)
+            data = next_page.result()
             items = data.get("items", [])
             if not items:
                 log.info("No more items from OCM, stopping.")
                 break
 
+            next_page = page_executor.submit(fetch_page, offset + PAGE_LIMIT)
+
             log.info("Fetched %d assets at offset=%d", len(items), offset)
             total_assets += len(items)
 
+            page_futures = []
             for item in items:
                 # Skip folders here; we only download file-like assets
                 if item.get("type") == "folder":
                     continue
                 file_assets += 1
-                futures.append(
+                page_futures.append(
                     executor.submit(download_asset_binary, item, folder_paths)
                 )
+            futures.extend(page_futures)
 
             offset += PAGE_LIMIT
-            # Update checkpoint after each page
-            state["last_offset"] = offset
-            save_state(state)
+            pending_pages.append((offset, page_futures))
+            advance_checkpoint()
 
         # Wait for all downloads to finish
         for i, f in enumerate(as_completed(futures), 1):
@@ -340,6 +646,7 @@ def export_assets(folder_paths):
                 f.result()
             except Exception as e:
                 log.error("Download task failed: %s", e)
+            advance_checkpoint()
             if i % 50 == 0:
                 log.info("Completed %d downloads", i)
 
@@ -355,30 +662,38 @@ def export_rbac():
     data = get_json(path)
 
     members = data.get("items", data) if isinstance(data, dict) else data
-    with open(RBAC_JSON, "w") as f:
-        json.dump(members, f, indent=2)
+    with open(RBAC_JSON, "wb") as f:
+        f.write(orjson.dumps(members, option=JSON_OPTIONS))
 
     log.info("RBAC exported to %s (%d members)", RBAC_JSON, len(members))
 
 
 def main():
     ensure_dirs()
+    open_state_db()
+    try:
+        # 1) Export folders once and build folder paths
+        if os.path.exists(FOLDERS_JSON):
+            log.info("folders.json exists, reusing it.")
+            with open(FOLDERS_JSON, "rb") as f:
+                folders = orjson.loads(f.read())
+        else:
+            # Streamed straight into build_folder_paths, no intermediate list
+            folders = export_folders()
 
-    # 1) Export folders once and build folder paths
-    if os.path.exists(FOLDERS_JSON):
-        log.info("folders.json exists, reusing it.")
-        with open(FOLDERS_JSON) as f:
-            folders = json.load(f)
-    else:
-        folders = export_folders()
-
-    folder_paths = build_folder_paths(folders)
-
-    # 2) Export assets (files) with checkpoint
-    export_assets(folder_paths)
+        folder_paths = build_folder_paths(folders)
 
-    # 3) Export RBAC (for later Drive permissions sync)
-    export_rbac()
+        # 2) Export assets (files) with checkpoint
+        writer = start_metadata_writer()
+        try:
+            export_assets(folder_paths)
+        finally:
+            stop_metadata_writer(writer)
+
+        # 3) Export RBAC (for later Drive permissions sync)
+        export_rbac()
+    finally:
+        close_state_db()
 
     log.info("OCM export complete. Root dir: %s", EXPORT_ROOT)
 